@@ -1,5 +1,4 @@
 from datetime import datetime
-import shuffle
 
 ## Question 1 
 
@@ -69,6 +68,104 @@ def summarize_cheaters_per_team(cheaters_per_team):
     for count, num_teams in sorted(cheater_counts.items()):
         print(f"Number of teams with {count} cheater(s): {num_teams}")
 
+def count_cheaters_histogram(teams, cheaters, histogram=None):
+    """
+    Counts teams by their number of cheaters directly into a histogram, without
+    keeping a per-team dictionary.
+
+    Takes:
+    - teams: A dictionary where keys are (match_id, team_id) tuples and values are lists of player account IDs.
+    - cheaters: A set of player account IDs that represent cheaters.
+    - histogram (list, optional): An existing histogram to add the counts to.
+
+    Returns:
+    - list: A histogram where index n is the number of teams with n cheaters. It is
+            sized to the largest team seen, so no team is left out.
+    """
+    if histogram is None:
+        histogram = []
+
+    for players in teams.values():
+        # Make room for every possible count on a team of this size
+        if len(players) >= len(histogram):
+            histogram.extend([0] * (len(players) + 1 - len(histogram)))
+
+        cheater_count = sum(1 for player_acc_id in players if player_acc_id in cheaters)
+        histogram[cheater_count] += 1
+
+    return histogram
+
+def iter_match_team_chunks(team_rows, chunk_size=1000):
+    """
+    Groups streamed team rows into chunks of whole matches.
+
+    Rows of a match must be contiguous, as they are in team_ids.txt, so that no team
+    is split across chunks. To keep memory bounded, a match that reappears is only
+    detected within the current chunk.
+
+    Takes:
+    - team_rows (iterable): Rows in the format (match_id, player_acc_id, team_id).
+    - chunk_size (int, optional): Number of matches per chunk (default is 1000).
+
+    Yields:
+    - dict: Teams of up to chunk_size matches, in the format returned by organize_teams_by_match.
+    """
+    chunk_matches = set()
+    chunk_rows = []
+    current_match = None
+
+    for row in team_rows:
+        match_id = row[0]
+
+        if match_id != current_match:
+            if match_id in chunk_matches:
+                raise ValueError(f"Rows for match {match_id} are not contiguous")
+            current_match = match_id
+
+            # Emit the chunk once it holds chunk_size complete matches
+            if len(chunk_matches) == chunk_size:
+                yield organize_teams_by_match(chunk_rows)
+                chunk_rows = []
+                chunk_matches = set()
+            chunk_matches.add(match_id)
+
+        chunk_rows.append(row)
+
+    if chunk_rows:
+        yield organize_teams_by_match(chunk_rows)
+
+def stream_cheaters_histogram(team_rows, cheaters, chunk_size=1000):
+    """
+    Builds the histogram of cheaters per team from streamed team rows, one chunk of matches at a time.
+
+    Takes:
+    - team_rows (iterable): Rows in the format (match_id, player_acc_id, team_id), e.g. from get_file_data.iter_team_data.
+    - cheaters: A set of player account IDs that represent cheaters.
+    - chunk_size (int, optional): Number of matches per chunk (default is 1000).
+
+    Returns:
+    - list: A histogram where index n is the number of teams with n cheaters.
+    """
+    histogram = []
+
+    for match_teams in iter_match_team_chunks(team_rows, chunk_size):
+        count_cheaters_histogram(match_teams, cheaters, histogram)
+
+    return histogram
+
+def summarize_cheaters_histogram(histogram):
+    """
+    Summarizes a histogram of cheaters per team.
+
+    Takes:
+    - histogram: A list where index n is the number of teams with n cheaters.
+
+    Returns:
+    - Statements of the form: "Number of teams with X cheater(s): Y".
+    """
+    for count, num_teams in enumerate(histogram):
+        print(f"Number of teams with {count} cheater(s): {num_teams}")
+
 ## Question 2 
 
 def filter_kills_by_cheaters(kills, cheaters):
@@ -162,13 +259,14 @@ def sort_kills_by_time(kills):
     """
     return sorted(kills, key=get_kill_time)
 
-def find_first_cheater(kills, cheater_ids):
+def find_first_cheater(kills, cheater_ids, threshold=3):
     """
-    Finds the first cheater who kills three different players in a match.
+    Finds the first cheater who kills `threshold` different players in a match.
 
     Takes:
     - kills (list of tuples): Each entry contains [killer_id, killed_id, kill_time].
     - cheater_ids (set): A set of cheater IDs for quick lookup.
+    - threshold (int, optional): Number of distinct victims needed to be noticed (default is 3).
 
     Returns:
     - tuple: The observed_time and the killer_id of the first cheater, or None if no cheater found.
@@ -181,7 +279,7 @@ def find_first_cheater(kills, cheater_ids):
 
         kills_by_killer[killer_id].add(killed_id)
 
-        if len(kills_by_killer[killer_id]) >= 3:
+        if len(kills_by_killer[killer_id]) >= threshold:
             if killer_id in cheater_ids:
                 return kill_time, killer_id
             break
@@ -204,24 +302,61 @@ def filter_kills_after_observed_time(kills, observed_time):
         if kill_time > observed_time
     ]
 
-def filter_kills_by_cheating_time(kills, cheaters_data):
+def group_kills_by_match(kills):
+    """
+    Organizes kills by match_id.
+
+    Takes:
+    - kills (list of tuples): Each entry contains [match_id, killer_id, killed_id, kill_time].
+
+    Returns:
+    - dict: A dictionary where key is match_id and value is a list of (killer_id, killed_id, kill_time) tuples.
+    """
+    kills_by_match = {}
+    for match_id, killer_id, killed_id, kill_time in kills:
+        if match_id not in kills_by_match:
+            kills_by_match[match_id] = []
+        kills_by_match[match_id].append((killer_id, killed_id, kill_time))
+
+    return kills_by_match
+
+def filter_kills_by_observed_times(kills_by_match, observed_times):
+    """
+    Filters the kills of each match to those after the match's observed time.
+
+    Takes:
+    - kills_by_match (dict): A dictionary where key is match_id and value is a list of
+            (killer_id, killed_id, kill_time) tuples.
+    - observed_times (dict): A dictionary where key is match_id and value is the observed time.
+
+    Returns:
+    - dict: A dictionary where key is match_id and value is a list of filtered kills.
     """
-    Filters kills to only include data after the first time a player kills three different players
+    filtered_kills_by_match = {}
+    for match_id, match_kills in kills_by_match.items():
+        if match_id in observed_times:
+            observed_time = observed_times[match_id]
+            if isinstance(observed_time, str):
+                observed_time = datetime.strptime(observed_time, "%Y-%m-%d %H:%M")
+            filtered_kills_by_match[match_id] = filter_kills_after_observed_time(match_kills, observed_time)
+
+    return filtered_kills_by_match
+
+def filter_kills_by_cheating_time(kills, cheaters_data, threshold=3):
+    """
+    Filters kills to only include data after the first time a player kills `threshold` different players
     and is a cheater. Returns a dictionary of filtered kills for each match.
     
     Takes:
     - kills (list of tuples): Each entry contains [match_id, killer_id, killed_id, kill_time].
     - cheaters_data (list): List of cheaters, where each entry contains [player_acc_id, cheating_start_time, banned_date].
+    - threshold (int, optional): Number of distinct victims needed to be noticed (default is 3).
     
     Returns:
     - dict: A dictionary where key is match_id and value is a list of filtered kills.
     """
     # Organize kills by match_id
-    kills_by_match = {}
-    for match_id, killer_id, killed_id, kill_time in kills:
-        if match_id not in kills_by_match:
-            kills_by_match[match_id] = []
-        kills_by_match[match_id].append((killer_id, killed_id, kill_time))
+    kills_by_match = group_kills_by_match(kills)
 
     # Create a set of cheater ids for quick lookup
     cheater_ids = {cheater[0] for cheater in cheaters_data}
@@ -235,22 +370,151 @@ def filter_kills_by_cheating_time(kills, cheaters_data):
         sorted_kills = sort_kills_by_time(match_kills)
 
         # Find the first cheater and observed time for this match
-        observed_data = find_first_cheater(sorted_kills, cheater_ids)
+        observed_data = find_first_cheater(sorted_kills, cheater_ids, threshold)
         if observed_data:
             observed_time, _ = observed_data
             # Store the observed time in result
             result[match_id] = observed_time
 
     # Filter kills after the observed time for each match
-    filtered_kills_by_match = {}
+    return filter_kills_by_observed_times(kills_by_match, result)
+
+def build_kill_threshold_index(kills_by_match, max_threshold=3):
+    """
+    Records, in a single pass over each match's time-sorted kills, when each killer
+    first reaches k distinct victims for every k from 1 to max_threshold.
+
+    Takes:
+    - kills_by_match (dict): A dictionary where key is match_id and value is a list of
+            (killer_id, killed_id, kill_time) tuples, as returned by group_kills_by_match.
+    - max_threshold (int, optional): The largest number of distinct victims to index (default is 3).
+
+    Returns:
+    - dict: A dictionary where key is match_id and value is a list of length max_threshold.
+            Entry k - 1 is a list of (kill_time, killer_id) tuples, in time order, for every
+            killer who reached k distinct victims in that match.
+    """
+    threshold_index = {}
+
     for match_id, match_kills in kills_by_match.items():
-        if match_id in result:
-            observed_time = result[match_id]
-            if isinstance(observed_time, str):
-                observed_time = datetime.strptime(observed_time, "%Y-%m-%d %H:%M")
-            filtered_kills_by_match[match_id] = filter_kills_after_observed_time(match_kills, observed_time)
+        reached = [[] for _ in range(max_threshold)]
+        kills_by_killer = {}
 
-    return filtered_kills_by_match
+        for killer_id, killed_id, kill_time in sort_kills_by_time(match_kills):
+            if killer_id not in kills_by_killer:
+                kills_by_killer[killer_id] = set()
+
+            victims = kills_by_killer[killer_id]
+            if killed_id in victims:
+                continue
+            victims.add(killed_id)
+
+            # Record the moment this killer reaches a new number of distinct victims
+            if len(victims) <= max_threshold:
+                reached[len(victims) - 1].append((kill_time, killer_id))
+
+        threshold_index[match_id] = reached
+
+    return threshold_index
+
+def check_indexed_threshold(threshold_index, threshold):
+    """
+    Checks that a threshold can be looked up in a kill threshold index.
+
+    Takes:
+    - threshold_index (dict): The index returned by build_kill_threshold_index.
+    - threshold (int): Number of distinct victims needed to be noticed.
+
+    Returns:
+    - None: Raises ValueError if the threshold is below 1 or above the indexed maximum.
+    """
+    if threshold < 1:
+        raise ValueError(f"threshold must be at least 1, got {threshold}")
+
+    # Every match is indexed up to the same maximum, so one entry is enough to check
+    for reached in threshold_index.values():
+        if threshold > len(reached):
+            raise ValueError(f"threshold {threshold} exceeds the indexed maximum of {len(reached)}")
+        break
+
+def get_observed_times_for_threshold(threshold_index, cheater_ids, threshold=3):
+    """
+    Finds the observed time of each match for a given threshold, using the same rule as
+    find_first_cheater: the first killer to reach `threshold` distinct victims must be a cheater.
+
+    Takes:
+    - threshold_index (dict): The index returned by build_kill_threshold_index.
+    - cheater_ids (set): A set of cheater IDs for quick lookup.
+    - threshold (int, optional): Number of distinct victims needed to be noticed (default is 3).
+
+    Returns:
+    - dict: A dictionary where key is match_id and value is the observed time.
+    """
+    check_indexed_threshold(threshold_index, threshold)
+
+    observed_times = {}
+
+    for match_id, reached in threshold_index.items():
+        if reached[threshold - 1]:
+            kill_time, killer_id = reached[threshold - 1][0]
+            if killer_id in cheater_ids:
+                observed_times[match_id] = kill_time
+
+    return observed_times
+
+def find_first_cheater_at_threshold(threshold_index, cheater_ids, threshold=3):
+    """
+    Finds the first cheater in each match to reach `threshold` distinct victims, even if
+    a non-cheater reached it earlier.
+
+    Takes:
+    - threshold_index (dict): The index returned by build_kill_threshold_index.
+    - cheater_ids (set): A set of cheater IDs for quick lookup.
+    - threshold (int, optional): Number of distinct victims needed to be noticed (default is 3).
+
+    Returns:
+    - dict: A dictionary where key is match_id and value is a tuple (observed_time, killer_id).
+    """
+    check_indexed_threshold(threshold_index, threshold)
+
+    first_cheaters = {}
+
+    for match_id, reached in threshold_index.items():
+        for kill_time, killer_id in reached[threshold - 1]:
+            if killer_id in cheater_ids:
+                first_cheaters[match_id] = (kill_time, killer_id)
+                break
+
+    return first_cheaters
+
+def filter_kills_by_cheating_thresholds(kills, cheaters_data, thresholds=(1, 2, 3, 4, 5)):
+    """
+    Runs filter_kills_by_cheating_time for several thresholds while scanning each match only once.
+
+    Takes:
+    - kills (list of tuples): Each entry contains [match_id, killer_id, killed_id, kill_time].
+    - cheaters_data (list): List of cheaters, where each entry contains [player_acc_id, cheating_start_time, banned_date].
+    - thresholds (iterable of int, optional): The thresholds to compute (default is 1 to 5).
+
+    Returns:
+    - dict: A dictionary where key is the threshold and value is the dictionary of filtered kills
+            per match that filter_kills_by_cheating_time would return for that threshold.
+    """
+    thresholds = list(thresholds)
+    if not thresholds or min(thresholds) < 1:
+        raise ValueError(f"thresholds must be at least 1, got {thresholds}")
+
+    kills_by_match = group_kills_by_match(kills)
+    cheater_ids = {cheater[0] for cheater in cheaters_data}
+
+    threshold_index = build_kill_threshold_index(kills_by_match, max(thresholds))
+
+    return {
+        threshold: filter_kills_by_observed_times(
+            kills_by_match, get_observed_times_for_threshold(threshold_index, cheater_ids, threshold)
+        )
+        for threshold in thresholds
+    }
 
 def update_observers(match_observers, killer_id, killed_id, kill_time, observed_time, cheater_info):
     """
@@ -341,6 +605,7 @@ def get_match_end_times(filtered_kills_by_cheating_time):
     return {
         match_id: max(kill_time for _, _, kill_time, _ in kills)
         for match_id, kills in filtered_kills_by_cheating_time.items()
+        if kills  # A match can have no kills left after its observed time
     }
 
 def get_observed_times(filtered_kills_by_cheating_time):
@@ -356,6 +621,7 @@ def get_observed_times(filtered_kills_by_cheating_time):
     return {
         match_id: kills[0][2]  # Get the first observed_time from the first kill in the match
         for match_id, kills in filtered_kills_by_cheating_time.items()
+        if kills
     }
 
 def check_if_cheater_started_after_observed_time(observer_id, observed_time, match_end, cheater_start_times):
@@ -414,4 +680,141 @@ def filter_cheaters(observers, filtered_kills_by_cheating_time, cheaters_data):
             if check_if_cheater_started_after_observed_time(observer_id, observed_time, match_end, cheater_start_times):
                 filtered_cheaters.add(observer_id)
 
-    return len(filtered_cheaters)
\ No newline at end of file
+    return len(filtered_cheaters)
+
+## Exposure across matches
+
+def find_exposure_events(kills, cheaters_data):
+    """
+    Finds every time a non-cheating player was exposed to an active cheater, in any match.
+
+    A player is exposed by being killed by an active cheater ("killed"), or by taking part in a
+    kill between two non-cheaters after a cheater was noticed in the match ("observed").
+    Each type of exposure is counted once per player and match, at its earliest time.
+
+    Takes:
+    - kills (list of tuples): Each entry contains [match_id, killer_id, killed_id, kill_time].
+    - cheaters_data (list): List of cheaters, where each entry contains [player_acc_id, cheating_start_time, banned_date].
+
+    Returns:
+    - list of tuples: Exposure events (exposure_time, player_acc_id, exposure_type, match_id), sorted by time.
+    """
+    cheater_start_times = {cheater[0]: cheater[1] for cheater in cheaters_data}
+    events = []
+
+    # Victims of active cheaters who were not cheating themselves
+    first_killed = {}
+    for match_id, killer_id, killed_id, kill_time in kills:
+        if killer_id in cheater_start_times and cheater_start_times[killer_id] <= kill_time:
+            if killed_id not in cheater_start_times or cheater_start_times[killed_id] >= kill_time:
+                exposure_key = (match_id, killed_id)
+                if exposure_key not in first_killed or kill_time < first_killed[exposure_key]:
+                    first_killed[exposure_key] = kill_time
+
+    for (match_id, player_acc_id), exposure_time in first_killed.items():
+        events.append((exposure_time, player_acc_id, "killed", match_id))
+
+    # Observers of a noticed cheater, using the same rule as find_observers
+    for match_id, match_kills in filter_kills_by_cheating_time(kills, cheaters_data).items():
+        first_observed = {}
+        for killer_id, killed_id, kill_time, observed_time in match_kills:
+            match_observers = set()
+            update_observers(match_observers, killer_id, killed_id, kill_time, observed_time, cheater_start_times)
+            for player_acc_id in match_observers:
+                if player_acc_id not in first_observed or kill_time < first_observed[player_acc_id]:
+                    first_observed[player_acc_id] = kill_time
+
+        for player_acc_id, exposure_time in first_observed.items():
+            events.append((exposure_time, player_acc_id, "observed", match_id))
+
+    # Merge the events of all matches into a single timeline
+    return sorted(events, key=lambda event: event[0])
+
+def build_exposure_timeline(kills, cheaters_data):
+    """
+    Builds, for every player in the kills data, a summary of their exposures to cheaters
+    across all matches before they started cheating.
+
+    Takes:
+    - kills (list of tuples): Each entry contains [match_id, killer_id, killed_id, kill_time].
+    - cheaters_data (list): List of cheaters, where each entry contains [player_acc_id, cheating_start_time, banned_date].
+
+    Returns:
+    - dict: A dictionary where key is player_acc_id and value is a dictionary with:
+        - "cheating_start": The player's cheating start time, or None if they never cheated.
+        - "first_seen": Time of the player's first kill or death in the kills data.
+        - "first_exposure": Time of the first exposure before cheating, or None.
+        - "exposures": Number of matches with any exposure before cheating.
+        - "killed": Number of those matches where the player was killed by a cheater.
+        - "observed": Number of those matches where the player observed a cheater.
+    A match where the player was both killed and observing counts once in "exposures"
+    and once in each of "killed" and "observed".
+    """
+    cheater_start_times = {cheater[0]: cheater[1] for cheater in cheaters_data}
+
+    timeline = {}
+    for _, killer_id, killed_id, kill_time in kills:
+        for player_acc_id in (killer_id, killed_id):
+            if player_acc_id in timeline:
+                if kill_time < timeline[player_acc_id]["first_seen"]:
+                    timeline[player_acc_id]["first_seen"] = kill_time
+            else:
+                timeline[player_acc_id] = {
+                    "cheating_start": cheater_start_times.get(player_acc_id),
+                    "first_seen": kill_time,
+                    "first_exposure": None,
+                    "exposures": 0,
+                    "killed": 0,
+                    "observed": 0,
+                }
+
+    exposed_matches = set()
+
+    for exposure_time, player_acc_id, exposure_type, match_id in find_exposure_events(kills, cheaters_data):
+        player = timeline[player_acc_id]
+
+        # Only exposures before the player started cheating can have led to it
+        if player["cheating_start"] is not None and player["cheating_start"] <= exposure_time:
+            continue
+
+        if player["first_exposure"] is None:
+            player["first_exposure"] = exposure_time
+        if (player_acc_id, match_id) not in exposed_matches:
+            exposed_matches.add((player_acc_id, match_id))
+            player["exposures"] += 1
+        player[exposure_type] += 1
+
+    return timeline
+
+def cheating_rate_by_exposures(timeline, exposure_type="exposures"):
+    """
+    Groups players by their number of prior exposures and computes the share who started cheating.
+
+    Players who were already cheating when they first appear in the kills data are left out,
+    since none of their exposures could be observed before they started cheating.
+
+    Takes:
+    - timeline (dict): The dictionary returned by build_exposure_timeline.
+    - exposure_type (str, optional): The count to group by: "exposures", "killed" or "observed" (default is "exposures").
+
+    Returns:
+    - dict: A dictionary where key is the number of prior exposures and value is a tuple
+            (number_of_players, number_of_cheaters, cheating_probability).
+    """
+    totals = {}
+
+    for player in timeline.values():
+        if player["cheating_start"] is not None and player["cheating_start"] <= player["first_seen"]:
+            continue
+
+        count = player[exposure_type]
+        if count not in totals:
+            totals[count] = [0, 0]
+        totals[count][0] += 1
+        if player["cheating_start"] is not None:
+            totals[count][1] += 1
+
+    return {
+        count: (num_players, num_cheaters, num_cheaters / num_players)
+        for count, (num_players, num_cheaters) in sorted(totals.items())
+    }
@@ -0,0 +1,164 @@
+import json
+import os
+import random
+
+def encode_rng_state(rng):
+    """
+    Converts the state of a random.Random instance into a JSON-serializable list.
+
+    Takes:
+    - rng (random.Random): The random number generator.
+
+    Returns:
+    - list: The generator state as [version, internal_state, gauss_next].
+    """
+    version, internal_state, gauss_next = rng.getstate()
+    return [version, list(internal_state), gauss_next]
+
+def decode_rng_state(state):
+    """
+    Converts a state produced by encode_rng_state back into the tuple expected by random.Random.setstate.
+
+    Takes:
+    - state (list): The encoded generator state.
+
+    Returns:
+    - tuple: The generator state.
+    """
+    version, internal_state, gauss_next = state
+    return (version, tuple(internal_state), gauss_next)
+
+def read_checkpoints(fname):
+    """
+    Reads every complete checkpoint record from an append-only checkpoint file, without
+    modifying the file.
+
+    Reading stops at a record that was only partly written (e.g. because the node was
+    preempted or is still appending).
+
+    Takes:
+    - fname (str): Path to the checkpoint file.
+
+    Returns:
+    - tuple: (records, valid_end), where records is a list of dicts with the keys "seed",
+             "start", "results" and "rng_state", and valid_end is the byte offset just
+             after the last complete record.
+    """
+    records = []
+    valid_end = 0
+
+    if not os.path.exists(fname):
+        return records, valid_end
+
+    with open(fname, 'rb') as f:
+        for line in iter(f.readline, b''):
+            if not line.endswith(b'\n'):
+                break
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            valid_end = f.tell()
+
+    return records, valid_end
+
+def append_checkpoint(fname, seed, start, results, rng):
+    """
+    Appends a batch of completed iteration results and the current RNG state to a checkpoint file.
+
+    Takes:
+    - fname (str): Path to the checkpoint file.
+    - seed (int): The seed of the run the results belong to.
+    - start (int): Index of the first iteration in the batch.
+    - results (list): JSON-serializable results of the iterations in the batch.
+    - rng (random.Random): The generator, in its state after the last iteration of the batch.
+
+    Returns:
+    - None: The record is written to disk.
+    """
+    record = {"seed": seed, "start": start, "results": results, "rng_state": encode_rng_state(rng)}
+
+    with open(fname, 'a') as f:
+        f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+def run_with_checkpoints(run_iteration, num_iterations, fname, seed, checkpoint_every=100, progress=None):
+    """
+    Runs iterations of a simulation, checkpointing completed results and the RNG state, and
+    resumes from the checkpoint file if earlier iterations for the same seed were already run.
+
+    Takes:
+    - run_iteration (function): Takes a random.Random instance and returns a JSON-serializable result.
+    - num_iterations (int): Total number of iterations for this seed.
+    - fname (str): Path to the checkpoint file.
+    - seed (int): Seed of this run. Runs spread across machines should use different seeds.
+    - checkpoint_every (int, optional): Number of iterations per checkpoint record (default is 100).
+    - progress (ProgressMonitor, optional): Receives the results resumed from the checkpoint
+      file and then the result of each newly run iteration.
+
+    Returns:
+    - list: The results of all num_iterations iterations for this seed.
+    """
+    rng = random.Random(seed)
+    results = []
+
+    # Resume from the last checkpoint written for this seed
+    records, valid_end = read_checkpoints(fname)
+    for record in records:
+        if record["seed"] == seed:
+            results.extend(record["results"])
+            rng.setstate(decode_rng_state(record["rng_state"]))
+
+    # Drop any partly written record at the end of the file so new records append cleanly
+    if os.path.exists(fname) and os.path.getsize(fname) > valid_end:
+        with open(fname, 'r+b') as f:
+            f.truncate(valid_end)
+
+    if progress is not None and results:
+        progress.skip(results[:num_iterations])
+
+    batch = []
+    for iteration in range(len(results), num_iterations):
+        result = run_iteration(rng)
+        batch.append(result)
+
+        if progress is not None:
+            progress.update(result)
+
+        if len(batch) == checkpoint_every or iteration == num_iterations - 1:
+            append_checkpoint(fname, seed, iteration + 1 - len(batch), batch, rng)
+            results.extend(batch)
+            batch = []
+
+    return results[:num_iterations]
+
+def merge_checkpoints(fnames):
+    """
+    Merges the results of checkpoint files produced on several machines.
+
+    Takes:
+    - fnames (list of str): Paths to the checkpoint files.
+
+    Returns:
+    - list: The results of all iterations, ordered by seed and iteration.
+    """
+    records_by_seed = {}
+    shard_by_seed = {}
+
+    for fname in fnames:
+        records, _ = read_checkpoints(fname)
+        for record in records:
+            seed = record["seed"]
+
+            # Each seed stream must come from a single shard, or results would be counted twice
+            if shard_by_seed.setdefault(seed, fname) != fname:
+                raise ValueError(f"Seed {seed} appears in both {shard_by_seed[seed]} and {fname}")
+            records_by_seed.setdefault(seed, []).append(record)
+
+    merged_results = []
+    for seed in sorted(records_by_seed):
+        for record in sorted(records_by_seed[seed], key=lambda record: record["start"]):
+            merged_results.extend(record["results"])
+
+    return merged_results
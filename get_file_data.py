@@ -42,6 +42,21 @@ def get_team_data(fname):
                         ])
     return data
 
+# Stream team data
+def iter_team_data(fname):
+    """
+    Function to stream the teams.txt file one row at a time
+
+    Takes the name of the file.
+    Yields rows in the same format as get_team_data, without holding the whole file in memory.
+    """
+
+    with open(fname, 'r') as f: 
+        f.readline()
+        for line in f:
+            match_id, player_acc_id, team_id = line.strip().split('\t')
+            yield [match_id, player_acc_id, team_id]
+
 # Get kills data
 def get_kills_data(fname):
     """
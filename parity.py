@@ -0,0 +1,299 @@
+import math
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import cheaters
+import shuffle
+
+def generate_dataset(num_matches=300, num_players=400, players_per_match=40, kills_per_match=30,
+                     num_cheaters=80, team_size=4, seed=0):
+    """
+    Generates synthetic kills, cheaters and team data in the formats returned by get_file_data.
+
+    Takes:
+    - num_matches (int, optional): Number of matches to generate.
+    - num_players (int, optional): Size of the player base.
+    - players_per_match (int, optional): Number of players in each match.
+    - kills_per_match (int, optional): Number of kills in each match.
+    - num_cheaters (int, optional): Number of players who start cheating at some point.
+    - team_size (int, optional): Number of players per team.
+    - seed (int, optional): Seed for the generator.
+
+    Returns:
+    - tuple: (kills_data, cheaters_data, team_data).
+    """
+    rng = random.Random(seed)
+    players = [f"player_{i}" for i in range(num_players)]
+    start = datetime(2019, 3, 1)
+
+    kills_data = []
+    team_data = []
+    for match_number in range(num_matches):
+        match_id = f"match_{match_number}"
+        match_start = start + timedelta(minutes=rng.randint(0, 10 * 24 * 60))
+        match_players = rng.sample(players, players_per_match)
+
+        for kill_number in range(kills_per_match):
+            killer_id, killed_id = rng.sample(match_players, 2)
+            kill_time = match_start + timedelta(seconds=rng.randint(0, 30 * 60))
+            kills_data.append([match_id, killer_id, killed_id, kill_time])
+
+        for position, player_acc_id in enumerate(match_players):
+            team_data.append([match_id, player_acc_id, str(position // team_size)])
+
+    cheaters_data = []
+    for player_acc_id in rng.sample(players, num_cheaters):
+        cheating_start = start + timedelta(days=rng.randint(-2, 12))
+        cheaters_data.append([player_acc_id, cheating_start, cheating_start + timedelta(days=5)])
+
+    return kills_data, cheaters_data, team_data
+
+def observed_on_last_kill_match(cheaters_data, match_id="match_observed_on_last_kill"):
+    """
+    Builds a match where a cheater is noticed on the last kill of the match, so that no
+    kills are left after the observed time.
+
+    Takes:
+    - cheaters_data (list): The cheaters data; the first cheater is the killer in the match.
+    - match_id (str, optional): The id of the generated match.
+
+    Returns:
+    - list: Kills in the format returned by get_file_data.get_kills_data.
+    """
+    cheater_id, cheating_start, _ = cheaters_data[0]
+    kill_time = cheating_start + timedelta(hours=1)
+
+    return [[match_id, cheater_id, f"{match_id}_victim_{victim}", kill_time + timedelta(minutes=victim)]
+            for victim in range(3)]
+
+def time_call(function, *args):
+    """
+    Calls a function and measures how long it takes.
+
+    Takes:
+    - function (function): The function to call.
+    - args: The arguments to call it with.
+
+    Returns:
+    - tuple: (result, elapsed_seconds).
+    """
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+def ks_2samp(sample_a, sample_b):
+    """
+    Two-sample Kolmogorov-Smirnov test with the asymptotic p-value.
+
+    Takes:
+    - sample_a (list of numbers): The first sample.
+    - sample_b (list of numbers): The second sample.
+
+    Returns:
+    - tuple: (statistic, p_value).
+    """
+    sorted_a = sorted(sample_a)
+    sorted_b = sorted(sample_b)
+    n, m = len(sorted_a), len(sorted_b)
+
+    # Largest gap between the two empirical distribution functions
+    statistic = 0.0
+    i = j = 0
+    while i < n and j < m:
+        value = min(sorted_a[i], sorted_b[j])
+        while i < n and sorted_a[i] == value:
+            i += 1
+        while j < m and sorted_b[j] == value:
+            j += 1
+        statistic = max(statistic, abs(i / n - j / m))
+
+    effective_n = math.sqrt(n * m / (n + m))
+    ks_lambda = (effective_n + 0.12 + 0.11 / effective_n) * statistic
+
+    # Use the series that converges quickly for each range of the Kolmogorov distribution
+    if ks_lambda == 0:
+        p_value = 1.0
+    elif ks_lambda < 1.18:
+        y = math.exp(-math.pi ** 2 / (8 * ks_lambda ** 2))
+        p_value = 1 - math.sqrt(2 * math.pi) / ks_lambda * sum(y ** ((2 * k - 1) ** 2) for k in range(1, 6))
+    else:
+        p_value = 2 * sum((-1) ** (k - 1) * math.exp(-2 * k * k * ks_lambda ** 2) for k in range(1, 101))
+
+    return statistic, min(max(p_value, 0.0), 1.0)
+
+def check_equal(name, reference, candidate, *args):
+    """
+    Runs a reference and a candidate implementation of a deterministic stage and asserts
+    that they give exactly the same result.
+
+    Takes:
+    - name (str): Name of the stage, used in the report.
+    - reference (function): The reference implementation.
+    - candidate (function): The optimized implementation.
+    - args: The arguments passed to both.
+
+    Returns:
+    - dict: The name, reference and candidate times in seconds, and the speedup.
+    """
+    expected, reference_time = time_call(reference, *args)
+    actual, candidate_time = time_call(candidate, *args)
+
+    if expected != actual:
+        raise AssertionError(f"{name}: candidate result differs from the reference")
+
+    return {"name": name, "reference": reference_time, "candidate": candidate_time,
+            "speedup": reference_time / candidate_time if candidate_time else float("inf")}
+
+def check_distribution(name, reference, candidate, args, alpha=0.01):
+    """
+    Runs a reference and a candidate implementation of a randomized stage and asserts that
+    their samples are not distinguishable with a two-sample KS test.
+
+    Takes:
+    - name (str): Name of the stage, used in the report.
+    - reference (function): The reference implementation. Returns a dictionary of named samples.
+    - candidate (function): The optimized implementation. Returns the same named samples.
+    - args (tuple): The arguments passed to both.
+    - alpha (float, optional): Significance level below which the samples are considered different.
+
+    Returns:
+    - dict: The name, reference and candidate times in seconds, the speedup and the
+            smallest KS p-value across the samples.
+    """
+    expected, reference_time = time_call(reference, *args)
+    actual, candidate_time = time_call(candidate, *args)
+
+    min_p_value = 1.0
+    for sample_name in expected:
+        _, p_value = ks_2samp(expected[sample_name], actual[sample_name])
+        if p_value < alpha:
+            raise AssertionError(f"{name}: {sample_name} differs from the reference (KS p={p_value:.4f})")
+        min_p_value = min(min_p_value, p_value)
+
+    return {"name": name, "reference": reference_time, "candidate": candidate_time,
+            "speedup": reference_time / candidate_time if candidate_time else float("inf"),
+            "min_p_value": min_p_value}
+
+## Reference and candidate pipelines
+
+def reference_filtered_kills(kills_data, cheaters_data):
+    return {threshold: cheaters.filter_kills_by_cheating_time(kills_data, cheaters_data, threshold)
+            for threshold in range(1, 6)}
+
+def candidate_filtered_kills(kills_data, cheaters_data):
+    return cheaters.filter_kills_by_cheating_thresholds(kills_data, cheaters_data, range(1, 6))
+
+def observed_counts(filtered_kills_by_threshold, cheaters_data):
+    counts = {}
+    for threshold, filtered_kills in filtered_kills_by_threshold.items():
+        observers = cheaters.find_observers(filtered_kills, cheaters_data)
+        counts[threshold] = cheaters.filter_cheaters(observers, filtered_kills, cheaters_data)
+    return counts
+
+def reference_observed_counts(kills_data, cheaters_data):
+    return observed_counts(reference_filtered_kills(kills_data, cheaters_data), cheaters_data)
+
+def candidate_observed_counts(kills_data, cheaters_data):
+    return observed_counts(candidate_filtered_kills(kills_data, cheaters_data), cheaters_data)
+
+def reference_killed_count(kills_data, cheaters_data):
+    return cheaters.cheaters_after_killed(kills_data, cheaters_data)
+
+def candidate_killed_count(kills_data, cheaters_data):
+    cheaters_set = {cheater[0] for cheater in cheaters_data}
+    return cheaters.cheaters_after_killed(cheaters.filter_kills_by_cheaters(kills_data, cheaters_set), cheaters_data)
+
+def collapse_to_histogram(match_teams, cheaters_per_team):
+    # Size the histogram to the largest team, as count_cheaters_histogram does
+    histogram = [0] * (max(len(players) for players in match_teams.values()) + 1)
+    for count in cheaters_per_team.values():
+        histogram[count] += 1
+    return histogram
+
+def reference_histogram(team_data, cheaters_set):
+    match_teams = cheaters.organize_teams_by_match(team_data)
+    return collapse_to_histogram(match_teams, cheaters.count_cheaters_per_team(match_teams, cheaters_set))
+
+def candidate_histogram(team_data, cheaters_set):
+    return cheaters.stream_cheaters_histogram(iter(team_data), cheaters_set, chunk_size=50)
+
+def histogram_samples(histograms):
+    num_bins = max(len(histogram) for histogram in histograms)
+    return {f"teams with {count} cheater(s)": [histogram[count] if count < len(histogram) else 0
+                                               for histogram in histograms]
+            for count in range(num_bins)}
+
+def reference_randomized_histograms(team_data, cheaters_set, num_iterations, seed):
+    match_teams = cheaters.organize_teams_by_match(team_data)
+    randomized_results = shuffle.count_cheaters_after_randomization(
+        match_teams, cheaters_set, num_iterations, random.Random(seed))
+
+    return histogram_samples([collapse_to_histogram(match_teams, cheaters_per_team)
+                              for cheaters_per_team in randomized_results])
+
+def candidate_randomized_histograms(team_data, cheaters_set, num_iterations, seed):
+    return histogram_samples(shuffle.histogram_cheaters_after_randomization(
+        iter(team_data), cheaters_set, num_iterations, chunk_size=50, rng=random.Random(seed + 1)))
+
+def reference_simulation_counts(kills_data, cheaters_data, num_simulations, seed):
+    worlds = shuffle.generate_simulated_worlds(kills_data, num_simulations, random.Random(seed))
+    flattened_simulations = [shuffle.flatten_kills(world) for world in worlds]
+
+    observed_kills = cheaters.filter_kills_by_cheating_time(kills_data, cheaters_data)
+    observers = cheaters.find_observers(observed_kills, cheaters_data)
+
+    return {
+        "killed": shuffle.summarize_cheaters_after_killed(flattened_simulations, cheaters_data),
+        "observed": shuffle.summarize_simulation_results(flattened_simulations, cheaters_data, observers, observed_kills),
+    }
+
+def candidate_simulation_counts(kills_data, cheaters_data, num_simulations, seed):
+    with tempfile.TemporaryDirectory() as directory:
+        counts = shuffle.checkpointed_simulation_counts(
+            kills_data, cheaters_data, num_simulations, os.path.join(directory, "checkpoint.jsonl"), seed + 1)
+
+    return {"killed": [killed for killed, _ in counts], "observed": [observed for _, observed in counts]}
+
+def run_parity_checks(seed=0, num_iterations=200):
+    """
+    Runs every reference/candidate pair on a generated dataset and prints a report.
+
+    Takes:
+    - seed (int, optional): Seed for the generated dataset and the randomizations.
+    - num_iterations (int, optional): Number of randomizations for the distributional checks.
+
+    Returns:
+    - list of dict: One report entry per check. Raises AssertionError on the first mismatch.
+    """
+    kills_data, cheaters_data, team_data = generate_dataset(seed=seed)
+    kills_data += observed_on_last_kill_match(cheaters_data)
+    cheaters_set = {cheater[0] for cheater in cheaters_data}
+
+    reports = [
+        check_equal("filter_kills_by_cheating_time", reference_filtered_kills, candidate_filtered_kills,
+                    kills_data, cheaters_data),
+        check_equal("find_observers + filter_cheaters", reference_observed_counts, candidate_observed_counts,
+                    kills_data, cheaters_data),
+        check_equal("cheaters_after_killed", reference_killed_count, candidate_killed_count,
+                    kills_data, cheaters_data),
+        check_equal("cheaters per team histogram", reference_histogram, candidate_histogram,
+                    team_data, cheaters_set),
+        check_distribution("randomized team histograms", reference_randomized_histograms,
+                           candidate_randomized_histograms, (team_data, cheaters_set, num_iterations, seed)),
+        check_distribution("simulated worlds", reference_simulation_counts, candidate_simulation_counts,
+                           (kills_data, cheaters_data, num_iterations // 4, seed)),
+    ]
+
+    for report in reports:
+        line = f"{report['name']:<35} reference {report['reference']:.3f}s  candidate {report['candidate']:.3f}s  speedup {report['speedup']:.2f}x"
+        if "min_p_value" in report:
+            line += f"  min KS p={report['min_p_value']:.3f}"
+        print(line)
+
+    return reports
+
+if __name__ == "__main__":
+    run_parity_checks()
@@ -0,0 +1,216 @@
+import os
+import sys
+import time
+
+def get_rss_bytes():
+    """
+    Reads the resident set size of the current process.
+
+    Returns:
+    - int: The resident memory in bytes, or None if it cannot be read on this platform.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def get_peak_rss_bytes():
+    """
+    Reads the peak resident set size of the current process.
+
+    Returns:
+    - int: The peak resident memory in bytes, or None if it cannot be read on this platform.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+class ProgressMonitor:
+    """
+    Tracks the progress of a simulation run and reports it to callbacks while the run is going.
+
+    Pass an instance as `progress` to the simulation functions in shuffle and checkpoint. Each
+    callback receives the dictionary returned by metrics() at most every `report_every` seconds,
+    and once more when the last iteration completes.
+
+    Numeric results feed the running mean and CI. For other results, pass `value` to pick the
+    number to track, e.g. value=lambda counts: counts[1] for the [killed, observed] counts of
+    shuffle.checkpointed_simulation_counts.
+    """
+
+    def __init__(self, num_iterations, callbacks=(), report_every=5.0, value=None):
+        self.num_iterations = num_iterations
+        self.callbacks = list(callbacks)
+        self.value = value
+        self.report_every = report_every
+        self.worker = os.getpid()
+
+        self.started_at = time.monotonic()
+        self.last_report = self.started_at
+        self.completed = 0
+        self.resumed = 0
+
+        # Running mean and sum of squared differences of numeric results (Welford's method)
+        self.count = 0
+        self.mean = 0.0
+        self.squared_diffs = 0.0
+
+    def add_result(self, result):
+        """
+        Adds a result to the running mean and CI if it, or the number picked by `value`, is numeric.
+        """
+        if self.value is not None:
+            result = self.value(result)
+
+        if isinstance(result, (int, float)) and not isinstance(result, bool):
+            self.count += 1
+            delta = result - self.mean
+            self.mean += delta / self.count
+            self.squared_diffs += delta * (result - self.mean)
+
+    def skip(self, results):
+        """
+        Records iterations that were completed before this run started, e.g. when resuming from
+        a checkpoint. They count toward the iterations completed and the running mean, but not
+        toward the iterations per second.
+
+        Takes:
+        - results (list): The results of the earlier iterations.
+
+        Returns:
+        - None: Callbacks are called if the earlier iterations already complete the run.
+        """
+        self.completed += len(results)
+        self.resumed += len(results)
+
+        for result in results:
+            self.add_result(result)
+
+        if self.completed >= self.num_iterations:
+            self.report()
+
+    def update(self, result=None):
+        """
+        Records one completed iteration.
+
+        Takes:
+        - result (optional): The result of the iteration. Numeric results feed the running mean and CI.
+
+        Returns:
+        - None: Callbacks are called if a report is due.
+        """
+        self.completed += 1
+        self.add_result(result)
+
+        now = time.monotonic()
+        if now - self.last_report >= self.report_every or self.completed == self.num_iterations:
+            self.last_report = now
+            self.report()
+
+    def metrics(self):
+        """
+        Returns the current progress metrics.
+
+        Returns:
+        - dict: Iterations completed and total, iterations per second, ETA in seconds, running
+                mean and 95% confidence interval of numeric results, current and peak RSS in bytes
+                and the worker pid.
+        """
+        elapsed = time.monotonic() - self.started_at
+        # Iterations resumed from a checkpoint were not run now, so they do not count toward the rate
+        rate = (self.completed - self.resumed) / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.num_iterations - self.completed, 0)
+
+        metrics = {
+            "worker": self.worker,
+            "iterations_completed": self.completed,
+            "iterations_total": self.num_iterations,
+            "iterations_per_second": rate,
+            "eta_seconds": remaining / rate if rate > 0 else (0.0 if remaining == 0 else None),
+            "running_mean": None,
+            "ci_lower": None,
+            "ci_upper": None,
+            "rss_bytes": get_rss_bytes(),
+            "peak_rss_bytes": get_peak_rss_bytes(),
+        }
+
+        if self.count:
+            # Same population-variance interval as summarize.calculate_observer_confidence_intervals
+            standard_deviation = (self.squared_diffs / self.count) ** 0.5
+            margin_of_error = 1.96 * (standard_deviation / self.count ** 0.5)
+            metrics["running_mean"] = self.mean
+            metrics["ci_lower"] = self.mean - margin_of_error
+            metrics["ci_upper"] = self.mean + margin_of_error
+
+        return metrics
+
+    def report(self):
+        """
+        Sends the current metrics to every callback.
+        """
+        metrics = self.metrics()
+        for callback in self.callbacks:
+            callback(metrics)
+
+def format_prometheus_metrics(metrics, prefix="simulation"):
+    """
+    Formats progress metrics in the Prometheus text exposition format.
+
+    Takes:
+    - metrics (dict): The dictionary returned by ProgressMonitor.metrics().
+    - prefix (str, optional): Prefix for the metric names (default is "simulation").
+
+    Returns:
+    - str: One gauge per metric, labelled with the worker pid. Metrics without a value are left out.
+    """
+    lines = []
+
+    for name, value in metrics.items():
+        if name == "worker" or value is None:
+            continue
+        lines.append(f"# TYPE {prefix}_{name} gauge")
+        lines.append(f'{prefix}_{name}{{worker="{metrics["worker"]}"}} {value}')
+
+    return "\n".join(lines) + "\n"
+
+def print_progress(metrics):
+    """
+    Callback that prints a one-line progress summary.
+
+    Takes:
+    - metrics (dict): The dictionary returned by ProgressMonitor.metrics().
+    """
+    line = (f"{metrics['iterations_completed']}/{metrics['iterations_total']} iterations, "
+            f"{metrics['iterations_per_second']:.2f} it/s")
+    if metrics["eta_seconds"] is not None:
+        line += f", ETA {metrics['eta_seconds']:.0f}s"
+    if metrics["running_mean"] is not None:
+        line += f", mean {metrics['running_mean']:.3f} ({metrics['ci_lower']:.3f}, {metrics['ci_upper']:.3f})"
+    print(line)
+
+def prometheus_file_writer(fname, prefix="simulation"):
+    """
+    Creates a callback that writes the metrics to a Prometheus text file, e.g. for the
+    node_exporter textfile collector.
+
+    Takes:
+    - fname (str): Path of the file to write.
+    - prefix (str, optional): Prefix for the metric names (default is "simulation").
+
+    Returns:
+    - function: A callback for ProgressMonitor.
+    """
+    def write_metrics(metrics):
+        # Write to a temporary file first so readers never see a partial file
+        temporary_fname = f"{fname}.{os.getpid()}.tmp"
+        with open(temporary_fname, 'w') as f:
+            f.write(format_prometheus_metrics(metrics, prefix))
+        os.replace(temporary_fname, fname)
+
+    return write_metrics
@@ -1,13 +1,15 @@
 import random
 import cheaters
+import checkpoint
 
-def randomize_teams(match_teams_dict):
+def randomize_teams(match_teams_dict, rng=random):
 
     """
     Function to randomize players' teams for each match. 
     
     Takes: 
     - Dictionary of match teams where keys are (match_id, team_id) tuples and values are lists of player account IDs.
+    - rng: The random number generator to shuffle with (default is the random module).
 
     Returns: 
     - Dictionary of randomized teams where keys are (match_id, team_id) tuples and values are lists of player account IDs.
@@ -31,7 +33,7 @@ def randomize_teams(match_teams_dict):
         num_teams = len(team_keys)
 
         # Shuffle players
-        random.shuffle(players)
+        rng.shuffle(players)
 
         # Split shuffled players into teams
         team_players = [players[i::num_teams] for i in range(num_teams)]
@@ -42,7 +44,7 @@ def randomize_teams(match_teams_dict):
 
     return randomized_teams_by_match
 
-def count_cheaters_after_randomization(teams_by_match, cheaters_ids, num_iterations=20):
+def count_cheaters_after_randomization(teams_by_match, cheaters_ids, num_iterations=20, rng=random):
     """
     Randomizes teams and counts the number of teams with specific cheater counts.
 
@@ -50,6 +52,7 @@ def count_cheaters_after_randomization(teams_by_match, cheaters_ids, num_iterati
     - teams_by_match: A dictionary where keys are (match_id, team_id) tuples and values are lists of player account IDs.
     - cheaters: A set of player account IDs that represent cheaters.
     - num_iterations: Number of randomizations to perform.
+    - rng: The random number generator to shuffle with (default is the random module).
 
     Returns:
     - A list of dictionaries where each dictionary contains the counts of teams with
@@ -59,7 +62,7 @@ def count_cheaters_after_randomization(teams_by_match, cheaters_ids, num_iterati
 
     for _ in range(num_iterations):
         # Randomize the teams
-        randomized_teams = randomize_teams(teams_by_match)
+        randomized_teams = randomize_teams(teams_by_match, rng)
 
         # Count cheaters in the randomized teams
         cheaters_per_team = cheaters.count_cheaters_per_team(randomized_teams, cheaters_ids)
@@ -69,6 +72,54 @@ def count_cheaters_after_randomization(teams_by_match, cheaters_ids, num_iterati
 
     return randomized_results
 
+def checkpointed_histograms_after_randomization(teams_by_match, cheaters_ids, num_iterations, checkpoint_file, seed, checkpoint_every=100, progress=None):
+    """
+    Randomizes teams and counts teams by their number of cheaters, checkpointing the histogram
+    of every iteration so that an interrupted run can be resumed.
+
+    Takes:
+    - teams_by_match: A dictionary where keys are (match_id, team_id) tuples and values are lists of player account IDs.
+    - cheaters_ids: A set of player account IDs that represent cheaters.
+    - num_iterations: Number of randomizations to perform for this seed.
+    - checkpoint_file: Path to the append-only checkpoint file.
+    - seed: Seed of this run. Runs on different machines should use different seeds.
+    - checkpoint_every: Number of iterations per checkpoint record.
+    - progress: Optional ProgressMonitor that receives resumed and newly run iterations.
+
+    Returns:
+    - A list of histograms, one per iteration, where index n is the number of teams with n cheaters.
+    """
+    def run_iteration(rng):
+        randomized_teams = randomize_teams(teams_by_match, rng)
+        return cheaters.count_cheaters_histogram(randomized_teams, cheaters_ids)
+
+    return checkpoint.run_with_checkpoints(run_iteration, num_iterations, checkpoint_file, seed, checkpoint_every, progress)
+
+def histogram_cheaters_after_randomization(team_rows, cheaters_ids, num_iterations=20, chunk_size=1000, rng=random):
+    """
+    Randomizes teams from streamed team rows and counts teams by their number of cheaters,
+    one chunk of matches at a time.
+
+    Takes:
+    - team_rows: An iterable of rows in the format (match_id, player_acc_id, team_id).
+    - cheaters_ids: A set of player account IDs that represent cheaters.
+    - num_iterations: Number of randomizations to perform.
+    - chunk_size: Number of matches per chunk.
+    - rng: The random number generator to shuffle with (default is the random module).
+
+    Returns:
+    - A list of histograms, one per iteration, where index n is the number of teams with n cheaters.
+    """
+    randomized_histograms = [[] for _ in range(num_iterations)]
+
+    for match_teams in cheaters.iter_match_team_chunks(team_rows, chunk_size):
+        # Every iteration randomizes the same chunk, so each chunk is read only once
+        for histogram in randomized_histograms:
+            randomized_teams = randomize_teams(match_teams, rng)
+            cheaters.count_cheaters_histogram(randomized_teams, cheaters_ids, histogram)
+
+    return randomized_histograms
+
 def flatten_kills(simulation):
     """
     Flattens a simulation of game kill events into a list of tuples.
@@ -90,7 +141,7 @@ def flatten_kills(simulation):
             for game_id, events in simulation.items()
             for killer, victim, time in events]
 
-def summarize_cheaters_after_killed(simulations, cheaters_data):
+def summarize_cheaters_after_killed(simulations, cheaters_data, progress=None):
     """
     Analyzes the flattened simulation data and counts the number of players who started 
     cheating after being killed by a cheater.
@@ -98,6 +149,7 @@ def summarize_cheaters_after_killed(simulations, cheaters_data):
     Takes:
     - simulations (list of tuples): A list of flattened kill events from each simulation.
     - cheaters_data (list of tuples): Data about cheaters, expected by cheaters_after_killed.
+    - progress (ProgressMonitor, optional): Receives the count of each simulation as it completes.
 
     Returns:
     - list of int: A list of counts of players who started cheating after being killed by a cheater.
@@ -110,16 +162,20 @@ def summarize_cheaters_after_killed(simulations, cheaters_data):
         count = cheaters.cheaters_after_killed(flat_kills, cheaters_data)
         results.append(count)
 
+        if progress is not None:
+            progress.update(count)
+
     return results
 
 ### Question 3
 
-def create_randomized_world(kills):
+def create_randomized_world(kills, rng=random):
     """
     Randomizes the kills and returns the dictionary with the simulation.
 
     Takes:
     - kills (list): List of kill data to randomize.
+    - rng (optional): The random number generator to shuffle with (default is the random module).
     
     Returns:
     - simulated_world (dict): Dictionary storing the randomized kills.
@@ -146,7 +202,7 @@ def create_randomized_world(kills):
 
         # Shuffle player IDs
         shuffled_players = list(players)
-        random.shuffle(shuffled_players)
+        rng.shuffle(shuffled_players)
         player_map = {original: shuffled for original, shuffled in zip(players, shuffled_players)}
 
         # Replace player IDs in interactions and include the original time
@@ -158,25 +214,58 @@ def create_randomized_world(kills):
     # Return the dictionary containing the simulation
     return simulated_worlds  
 
-def generate_simulated_worlds(kills_data, num_simulations=20):
+def generate_simulated_worlds(kills_data, num_simulations=20, rng=random):
     """
     Run simulations by randomizing the kills data multiple times.
     
     Takes:
     - kills_data: The data to be randomized in each simulation.
     - num_simulations: Number of simulations to run (default is 20).
+    - rng: The random number generator to shuffle with (default is the random module).
     
     Returns:
     - A list of simulated worlds.
     """
     simulations = []
     for _ in range(num_simulations):
-        simulated_world = create_randomized_world(kills_data)
+        simulated_world = create_randomized_world(kills_data, rng)
         simulations.append(simulated_world)
     return simulations
 
+def checkpointed_simulation_counts(kills_data, cheaters_data, num_simulations, checkpoint_file, seed, checkpoint_every=100, progress=None):
+    """
+    Runs simulations by randomizing the kills data and, for each simulated world, counts the players
+    who started cheating after being killed by a cheater and after observing a cheater. The counts
+    are checkpointed so that an interrupted run can be resumed, instead of keeping every world in memory.
 
-def summarize_simulation_results(simulations, cheaters_data, observers, filtered_kills_by_cheating_time):
+    Takes:
+    - kills_data: The data to be randomized in each simulation.
+    - cheaters_data: The cheaters data as expected by `cheaters_after_killed` and `filter_cheaters`.
+    - num_simulations: Number of simulations to run for this seed.
+    - checkpoint_file: Path to the append-only checkpoint file.
+    - seed: Seed of this run. Runs on different machines should use different seeds.
+    - checkpoint_every: Number of simulations per checkpoint record.
+    - progress: Optional ProgressMonitor that receives resumed and newly run simulations. Create it with
+      value=lambda counts: counts[1] to track the running mean of the observed count.
+
+    Returns:
+    - A list of [killed_count, observed_count] pairs, one per simulation.
+    """
+    def run_iteration(rng):
+        flat_kills = flatten_kills(create_randomized_world(kills_data, rng))
+
+        killed_count = cheaters.cheaters_after_killed(flat_kills, cheaters_data)
+
+        filtered_kills = cheaters.filter_kills_by_cheating_time(flat_kills, cheaters_data)
+        observers_in_match = cheaters.find_observers(filtered_kills, cheaters_data)
+        observed_count = cheaters.filter_cheaters(observers_in_match, filtered_kills, cheaters_data)
+
+        return [killed_count, observed_count]
+
+    return checkpoint.run_with_checkpoints(run_iteration, num_simulations, checkpoint_file, seed, checkpoint_every, progress)
+
+
+def summarize_simulation_results(simulations, cheaters_data, observers, filtered_kills_by_cheating_time, progress=None):
     """
     Analyzes simulated worlds to count the number of players who observed a cheater
     and started cheating.
@@ -188,6 +277,7 @@ def summarize_simulation_results(simulations, cheaters_data, observers, filtered
     - filtered_kills_by_cheating_time (dict): A dictionary where key is match_id and value is a list of tuples
                                                (killer_id, killed_id, kill_time, observed_time) for kills after 
                                                the first observed cheater.
+    - progress (ProgressMonitor, optional): Receives the count of each simulation as it completes.
 
     Returns:
     - list of int: A list of counts from each simulation.
@@ -206,5 +296,8 @@ def summarize_simulation_results(simulations, cheaters_data, observers, filtered
 
         # Store the result
         simulation_results.append(count)
+
+        if progress is not None:
+            progress.update(count)
     
     return simulation_results
\ No newline at end of file
@@ -77,6 +77,52 @@ def calculate_confidence_intervals(randomized_results, confidence_level=0.95):
     
     return confidence_intervals
 
+def calculate_mean_histogram(randomized_histograms):
+    """
+    Calculates the mean number of teams with each cheater count across randomization iterations.
+
+    Takes:
+    - randomized_histograms (list of list): One histogram per iteration, where index n is the
+      number of teams with n cheaters.
+
+    Returns:
+    - dict: A dictionary where keys are cheater counts and values are the mean number of teams.
+    """
+    num_bins = max(len(histogram) for histogram in randomized_histograms)
+    num_iterations = len(randomized_histograms)
+
+    return {
+        cheater_count: sum(histogram[cheater_count] if cheater_count < len(histogram) else 0
+                           for histogram in randomized_histograms) / num_iterations
+        for cheater_count in range(num_bins)
+    }
+
+def calculate_histogram_confidence_intervals(randomized_histograms, confidence_level=0.95):
+    """
+    Calculates the confidence intervals for the number of teams with each cheater count
+    across randomization iterations.
+
+    Takes:
+    - randomized_histograms (list of list): One histogram per iteration, where index n is the
+      number of teams with n cheaters.
+    - confidence_level (float, optional): The desired confidence level for the intervals. Default is 0.95.
+
+    Returns:
+    - dict: A dictionary where keys are cheater counts and values are tuples representing the
+      lower and upper bounds of the confidence interval.
+    """
+    mean_histogram = calculate_mean_histogram(randomized_histograms)
+    confidence_intervals = {}
+
+    for cheater_count in mean_histogram:
+        values = [histogram[cheater_count] if cheater_count < len(histogram) else 0
+                  for histogram in randomized_histograms]
+
+        # Reuse the single-sample interval for this bin's values
+        confidence_intervals[cheater_count] = calculate_observer_confidence_intervals(values, confidence_level)
+
+    return confidence_intervals
+
 def calculate_mean_observers(randomized_results):
     """
     Calculates the mean number of players who start cheating after observing a cheater 